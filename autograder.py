@@ -9,8 +9,14 @@ import os
 import sys
 import shutil
 import json
-import openpyxl
-from pathlib import Path
+
+import grader
+
+# Optional faster JSON encoder; the standard library is used when it is not installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Constants (modify these for your assignment)
 SUBMISSION_LOCATION = "/shared/submission"
@@ -18,10 +24,6 @@ SUBMISSION_DESTINATION = "/grader/submission.xlsx"
 REFERENCE_SOLUTION = "/grader/solution.xlsx"
 COURSERA_PARTID = "tW9y1"  # Update with your assignment's part ID
 
-# Worksheet names
-STUDENT_SHEET_NAME = "blank"
-SOLUTION_SHEET_NAME = "solution"
-
 def print_stderr(error_msg):
     """Print error message to stderr"""
     print(str(error_msg), file=sys.stderr)
@@ -29,16 +31,49 @@ def print_stderr(error_msg):
 def send_feedback(score, msg):
     """Send feedback to Coursera autograder"""
     post = {'fractionalScore': score, 'feedback': msg}
-    print(json.dumps(post))
+    
+    # Serialize once and reuse the text for both stdout and the feedback file
+    if orjson is not None:
+        payload = orjson.dumps(post).decode()
+    else:
+        payload = json.dumps(post)
+    print(payload)
     
     # Write feedback to file for Coursera
     try:
         os.makedirs("/shared", exist_ok=True)
-        with open("/shared/feedback.json", "w") as outfile:
-            json.dump(post, outfile)
+        with open("/shared/feedback.json", "w", encoding="utf-8") as outfile:
+            outfile.write(payload)
     except Exception as e:
         print_stderr(f"Error writing feedback: {e}")
 
+def stage_submission(source_path, dest_path):
+    """Link the submission into place, copying only when a hard link is not possible"""
+    # Stage under a temporary name and swap it in so an old submission is replaced atomically
+    temp_path = dest_path + ".tmp"
+    
+    # A leftover temp file may be a hard link to an earlier upload; unlink it rather than
+    # letting copyfile write through it
+    try:
+        os.remove(temp_path)
+    except FileNotFoundError:
+        pass
+    
+    try:
+        try:
+            os.link(source_path, temp_path)
+        except OSError:
+            # Different filesystem: fall back to a byte copy
+            shutil.copyfile(source_path, temp_path)
+        os.replace(temp_path, dest_path)
+    finally:
+        # Normally replace consumed it, but on failure, or when dest_path is already a link
+        # to the same inode (rename is then a no-op), the temp name would linger
+        try:
+            os.remove(temp_path)
+        except FileNotFoundError:
+            pass
+
 def grade_excel_worksheet():
     """
     Grade the Excel worksheet by comparing Y/N values in row 1
@@ -46,58 +81,8 @@ def grade_excel_worksheet():
     Returns:
         Dictionary with score and feedback
     """
-    try:
-        # Load workbooks
-        student_wb = openpyxl.load_workbook(SUBMISSION_DESTINATION, data_only=True)
-        solution_wb = openpyxl.load_workbook(REFERENCE_SOLUTION, data_only=True)
-        
-        # Verify sheets exist
-        if STUDENT_SHEET_NAME not in student_wb.sheetnames:
-            return {
-                "score": 0.0,
-                "feedback": f"Error: Worksheet '{STUDENT_SHEET_NAME}' not found in your submission."
-            }
-        
-        if SOLUTION_SHEET_NAME not in solution_wb.sheetnames:
-            return {
-                "score": 0.0,
-                "feedback": f"Error: Internal error - Solution worksheet not found."
-            }
-        
-        # Get sheets
-        student_sheet = student_wb[STUDENT_SHEET_NAME]
-        solution_sheet = solution_wb[SOLUTION_SHEET_NAME]
-        
-        # Get Y/N values from row 1 in both sheets
-        matches = 0
-        total_cells = 0
-        max_col = max(solution_sheet.max_column, student_sheet.max_column)
-        
-        # Start from column E (index 5 in openpyxl)
-        for col_idx in range(5, max_col + 1):
-            student_cell = student_sheet.cell(row=1, column=col_idx)
-            solution_cell = solution_sheet.cell(row=1, column=col_idx)
-            
-            if student_cell.value is not None and solution_cell.value is not None:
-                total_cells += 1
-                if student_cell.value == solution_cell.value:
-                    matches += 1
-        
-        # Calculate score and generate feedback
-        score = matches / total_cells if total_cells > 0 else 0.0
-        percentage = score * 100
-        feedback = f"Your score: {percentage:.2f}%\nYou correctly matched {matches} out of {total_cells} cells."
-        
-        return {
-            "score": score,
-            "feedback": feedback
-        }
-        
-    except Exception as e:
-        return {
-            "score": 0.0,
-            "feedback": f"Error grading your submission: {str(e)}"
-        }
+    # Shares the row-1 sweep with the local grader (copied into /grader by the Dockerfile)
+    return grader.grade_excel_worksheet(SUBMISSION_DESTINATION, REFERENCE_SOLUTION)
 
 def main(part_id):
     """Main function for the autograder"""
@@ -109,11 +94,11 @@ def main(part_id):
     
     # Find student submission
     learner_file = None
-    for f in os.listdir(SUBMISSION_LOCATION):
-        extension = Path(f).suffix.lower()
-        if extension in ['.xlsx', '.xlsm']:
-            learner_file = f
-            break
+    with os.scandir(SUBMISSION_LOCATION) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name.lower().endswith(('.xlsx', '.xlsm')):
+                learner_file = entry.path
+                break
     
     # Check if submission was found
     if learner_file is None:
@@ -122,7 +107,7 @@ def main(part_id):
     
     # Copy submission to destination
     try:
-        shutil.copyfile(os.path.join(SUBMISSION_LOCATION, learner_file), SUBMISSION_DESTINATION)
+        stage_submission(learner_file, SUBMISSION_DESTINATION)
     except Exception as e:
         print_stderr(f"Error copying submission: {e}")
         send_feedback(0.0, "Error processing your submission file.")
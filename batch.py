@@ -3,17 +3,81 @@
 
 import os
 import sys
-import glob
+import csv
 import time
-import pandas as pd
+import openpyxl
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 # Import the grading function from the local grader
-from grader import grade_excel_worksheet
+from grader import grade_excel_worksheet, load_solution_values
 
 # Constants
 RESULTS_FOLDER = "results"
 
+# Solution values for the current worker process (set by init_worker)
+worker_solution_values = None
+
+def init_worker(solution_values):
+    """Store the parsed solution so each worker grades without reloading it"""
+    global worker_solution_values
+    worker_solution_values = solution_values
+
+def grade_file(path):
+    """Grade a single Excel file and save its feedback"""
+    try:
+        result = grade_excel_worksheet(path, solution_values=worker_solution_values)
+        
+        # Store result
+        if 'score' in result:
+            # Save feedback
+            feedback_path = os.path.join(RESULTS_FOLDER, 
+                                       Path(path).stem + "_feedback.txt")
+            with open(feedback_path, 'w') as f:
+                f.write(result['feedback'])
+            
+            return {
+                'filename': os.path.basename(path),
+                'path': path,
+                'score': result['score'],
+                'percentage': result['score'] * 100,
+                'matches': result.get('matches', 0),
+                'total': result.get('total_cells', 0),
+                'feedback': result['feedback'],
+                'status': 'Success'
+            }
+        
+        return {
+            'filename': os.path.basename(path),
+            'path': path,
+            'score': 0,
+            'percentage': 0,
+            'matches': 0,
+            'total': 0,
+            'feedback': result.get('feedback', 'Unknown error'),
+            'status': 'Error'
+        }
+    except Exception as e:
+        print(f"Error processing {path}: {e}")
+        return {
+            'filename': os.path.basename(path),
+            'path': path,
+            'score': 0,
+            'percentage': 0,
+            'matches': 0,
+            'total': 0,
+            'feedback': f"Error: {str(e)}",
+            'status': 'Error'
+        }
+
+def find_excel_files(directory):
+    """List the Excel files in a directory in a single scan"""
+    # Skip dotfiles (e.g. macOS "._name.xlsx" AppleDouble files), as glob did
+    with os.scandir(directory) as entries:
+        return sorted(entry.path for entry in entries
+                      if entry.is_file() and not entry.name.startswith('.')
+                      and entry.name.lower().endswith(('.xlsx', '.xlsm')))
+
 def batch_grade(file_paths):
     """Grade multiple Excel files and generate reports"""
     # Create results folder
@@ -25,54 +89,26 @@ def batch_grade(file_paths):
     
     print(f"Found {len(file_paths)} files to grade.")
     
-    # Grade each file
+    # Parse the solution once and reuse it for every submission
+    try:
+        solution_values = load_solution_values()
+    except Exception as e:
+        print(f"Error loading solution: {e}")
+        return False
+    
+    if solution_values is None:
+        print("Error: Solution worksheet not found.")
+        return False
+    
+    # Grade files across processes; map keeps results in the original order
     results = []
-    for path in file_paths:
-        print(f"Grading: {path}")
-        try:
-            result = grade_excel_worksheet(path)
-            
-            # Store result
-            if 'score' in result:
-                results.append({
-                    'filename': os.path.basename(path),
-                    'path': path,
-                    'score': result['score'],
-                    'percentage': result['score'] * 100,
-                    'matches': result.get('matches', 0),
-                    'total': result.get('total_cells', 0),
-                    'feedback': result['feedback'],
-                    'status': 'Success'
-                })
-                
-                # Save feedback
-                feedback_path = os.path.join(RESULTS_FOLDER, 
-                                           Path(path).stem + "_feedback.txt")
-                with open(feedback_path, 'w') as f:
-                    f.write(result['feedback'])
-            else:
-                results.append({
-                    'filename': os.path.basename(path),
-                    'path': path,
-                    'score': 0,
-                    'percentage': 0,
-                    'matches': 0,
-                    'total': 0,
-                    'feedback': result.get('feedback', 'Unknown error'),
-                    'status': 'Error'
-                })
-        except Exception as e:
-            print(f"Error processing {path}: {e}")
-            results.append({
-                'filename': os.path.basename(path),
-                'path': path,
-                'score': 0,
-                'percentage': 0,
-                'matches': 0,
-                'total': 0,
-                'feedback': f"Error: {str(e)}",
-                'status': 'Error'
-            })
+    workers = min(os.cpu_count() or 1, len(file_paths))
+    chunksize = max(1, len(file_paths) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(solution_values,)) as executor:
+        for path, result in zip(file_paths, executor.map(grade_file, file_paths, chunksize=chunksize)):
+            print(f"Graded: {path}")
+            results.append(result)
     
     # Create report if we have results
     if results:
@@ -80,15 +116,24 @@ def batch_grade(file_paths):
         timestamp = time.strftime("%Y%m%d_%H%M%S")
         report_name = f"grading_summary_{timestamp}"
         
-        # Create DataFrame
-        df = pd.DataFrame(results)
+        # Build report rows
         columns = ['filename', 'percentage', 'matches', 'total', 'status']
-        report_df = df[columns].copy()
-        report_df['percentage'] = report_df['percentage'].apply(lambda x: f"{x:.2f}%")
+        report_rows = [[r['filename'], f"{r['percentage']:.2f}%", r['matches'], r['total'], r['status']]
+                       for r in results]
         
         # Save reports
-        report_df.to_csv(os.path.join(RESULTS_FOLDER, f"{report_name}.csv"), index=False)
-        report_df.to_excel(os.path.join(RESULTS_FOLDER, f"{report_name}.xlsx"), index=False)
+        with open(os.path.join(RESULTS_FOLDER, f"{report_name}.csv"), 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            writer.writerows(report_rows)
+        
+        # write_only streams rows to disk without building the cell grid in memory
+        report_wb = openpyxl.Workbook(write_only=True)
+        report_sheet = report_wb.create_sheet("Sheet1")
+        report_sheet.append(columns)
+        for row in report_rows:
+            report_sheet.append(row)
+        report_wb.save(os.path.join(RESULTS_FOLDER, f"{report_name}.xlsx"))
         
         # Print summary
         print("\n===== GRADING SUMMARY =====")
@@ -106,8 +151,8 @@ def batch_grade(file_paths):
         print(f"{'Filename':<30} {'Score':<10} {'Matches':<15} {'Status':<10}")
         print("-" * 80)
         
-        for _, row in report_df.iterrows():
-            print(f"{row['filename']:<30} {row['percentage']:<10} {row['matches']}/{row['total']:<15} {row['status']:<10}")
+        for filename, percentage, matches, total, status in report_rows:
+            print(f"{filename:<30} {percentage:<10} {matches}/{total:<15} {status:<10}")
         
         print("=" * 80)
         print(f"\nReports saved to: {RESULTS_FOLDER}/{report_name}.csv/xlsx")
@@ -125,14 +170,13 @@ def main():
     if not args:
         # No arguments - process all Excel files in current directory
         print("Processing all Excel files in current directory.")
-        files_to_grade = glob.glob("*.xlsx") + glob.glob("*.xlsm")
+        files_to_grade = find_excel_files(".")
     else:
         for arg in args:
             if os.path.isdir(arg):
                 # Process all Excel files in directory
                 print(f"Processing directory: {arg}")
-                files_to_grade.extend(glob.glob(os.path.join(arg, "*.xlsx")))
-                files_to_grade.extend(glob.glob(os.path.join(arg, "*.xlsm")))
+                files_to_grade.extend(find_excel_files(arg))
             elif os.path.isfile(arg) and arg.lower().endswith(('.xlsx', '.xlsm')):
                 files_to_grade.append(arg)
             else:
@@ -1,75 +1,376 @@
 #!/usr/bin/python3
 """
-Excel Worksheet Grader - Local Version
+Excel Worksheet Grader
 
-This module provides the grading functionality for local testing.
+This module provides the grading functionality shared by the Coursera
+autograder (autograder.py), the uploader, and the batch grader.
 """
 
-import openpyxl
+import os
+import json
+import zipfile
+import tempfile
+import posixpath
+import functools
+import xml.etree.ElementTree as ET
 
 # Worksheet names
 STUDENT_SHEET_NAME = "blank"
 SOLUTION_SHEET_NAME = "solution"
 
-def grade_excel_worksheet(student_file_path, solution_file_path="solution.xlsx"):
+# Answer cells run along row 1 starting at column E. Columns A-D hold the "Y:"/"N:"
+# labels and their SUM formulas; those are never read, because openpyxl does not
+# evaluate formulas and data_only only sees a cached result if Excel saved one.
+ANSWER_ROW = 1
+ANSWER_START_COLUMN = 5
+
+# Version of the solution sidecar cache; bump whenever load_answer_row's output can change
+SOLUTION_CACHE_VERSION = 2
+
+def read_answer_row(sheet):
+    """
+    Read the Y/N answer values from row 1 of a worksheet
+    
+    Args:
+        sheet: openpyxl worksheet to read
+        
+    Returns:
+        Tuple of cell values starting at column E
+    """
+    # values_only yields plain tuples and skips Cell objects
+    for row in sheet.iter_rows(min_row=ANSWER_ROW, max_row=ANSWER_ROW,
+                               min_col=ANSWER_START_COLUMN, values_only=True):
+        return row
+    return ()
+
+def load_answer_row(file_path, sheet_name):
+    """
+    Load the Y/N answer values from row 1 of a worksheet in an Excel file
+    
+    Args:
+        file_path: Path to the Excel file
+        sheet_name: Name of the worksheet to read
+        
+    Returns:
+        Tuple of cell values starting at column E, or None if the worksheet is missing
+    """
+    # Streaming the sheet XML stops after row 1, so it beats full readers on large submissions
+    try:
+        return load_answer_row_xml(file_path, sheet_name)
+    except (KeyError, ValueError, ET.ParseError):
+        # Unusual package layout; let a full workbook reader handle it
+        pass
+    
+    # Imported here so the XML path never pays openpyxl's (and numpy's) import cost
+    import openpyxl
+    
+    # read_only streams the sheet XML instead of building the full cell and style graph
+    workbook = openpyxl.load_workbook(file_path, data_only=True, read_only=True, keep_links=False)
+    try:
+        if sheet_name not in workbook.sheetnames:
+            return None
+        
+        # The stored dimensions can be stale, so read row 1 up to its last real cell
+        sheet = workbook[sheet_name]
+        sheet.reset_dimensions()
+        return read_answer_row(sheet)
+    finally:
+        # Read-only workbooks keep the file open until closed
+        workbook.close()
+
+def xml_local_name(tag):
+    """Strip the namespace from an ElementTree tag or attribute name"""
+    return tag.rsplit("}", 1)[-1]
+
+def xml_column_index(cell_reference):
+    """Convert the column letters of an A1 reference (e.g. "E1") to a 1-based index"""
+    index = 0
+    for char in cell_reference:
+        if not char.isalpha():
+            break
+        index = index * 26 + ord(char.upper()) - ord("A") + 1
+    return index
+
+def xml_relationships(archive, part_path):
+    """
+    Read the relationships of a part inside an Excel archive
+    
+    Args:
+        archive: Open zipfile.ZipFile of the workbook
+        part_path: Archive path of the part ("" for the package root)
+        
+    Returns:
+        Dictionary mapping relationship id to (type, archive path of the target)
+    """
+    folder, name = posixpath.split(part_path)
+    rels_path = posixpath.join(folder, "_rels", name + ".rels")
+    if rels_path not in archive.namelist():
+        return {}
+    
+    relationships = {}
+    for rel in ET.fromstring(archive.read(rels_path)):
+        target = rel.get("Target", "")
+        # Targets are relative to the part's folder unless they start at the package root
+        if target.startswith("/"):
+            target = target.lstrip("/")
+        else:
+            target = posixpath.normpath(posixpath.join(folder, target))
+        relationships[rel.get("Id")] = (rel.get("Type", ""), target)
+    return relationships
+
+def xml_shared_strings(archive, path, needed_indices):
+    """Read the shared strings referenced by row 1, stopping after the last one needed"""
+    strings = {}
+    if not needed_indices or path not in archive.namelist():
+        return strings
+    
+    last_index = max(needed_indices)
+    index = 0
+    with archive.open(path) as source:
+        for _, elem in ET.iterparse(source, events=("end",)):
+            if xml_local_name(elem.tag) != "si":
+                continue
+            if index in needed_indices:
+                # Plain text is a direct <t>; rich text is split across <r><t> runs
+                # (phonetic <rPh> runs are skipped, as Excel does)
+                parts = []
+                for child in elem:
+                    child_name = xml_local_name(child.tag)
+                    if child_name == "t":
+                        parts.append(child.text or "")
+                    elif child_name == "r":
+                        parts.extend(t.text or "" for t in child if xml_local_name(t.tag) == "t")
+                strings[index] = "".join(parts)
+            if index == last_index:
+                break
+            index += 1
+            elem.clear()
+    return strings
+
+def load_answer_row_xml(file_path, sheet_name):
+    """
+    Load the Y/N answer values from row 1 by streaming the worksheet XML directly
+    
+    Only row 1 is parsed: the sheet XML is read until that row ends, and only the
+    shared strings it references are resolved. Cached formula results are used,
+    matching openpyxl's data_only mode.
+    
+    Args:
+        file_path: Path to the Excel file
+        sheet_name: Name of the worksheet to read
+        
+    Returns:
+        Tuple of cell values starting at column E, or None if the worksheet is missing
+    """
+    with zipfile.ZipFile(file_path) as archive:
+        # Follow the package relationships to the workbook, its shared strings and the sheet
+        workbook_path = "xl/workbook.xml"
+        for rel_type, target in xml_relationships(archive, "").values():
+            if rel_type.endswith("/officeDocument"):
+                workbook_path = target
+        
+        workbook_rels = xml_relationships(archive, workbook_path)
+        shared_strings_path = None
+        for rel_type, target in workbook_rels.values():
+            if rel_type.endswith("/sharedStrings"):
+                shared_strings_path = target
+        
+        sheet_path = None
+        for elem in ET.fromstring(archive.read(workbook_path)).iter():
+            if xml_local_name(elem.tag) == "sheet" and elem.get("name") == sheet_name:
+                rel_id = next((value for key, value in elem.attrib.items() if xml_local_name(key) == "id"), None)
+                sheet_path = workbook_rels.get(rel_id, (None, None))[1]
+                break
+        if sheet_path is None:
+            return None
+        
+        # Stream the sheet until row 1 has been read
+        values = {}
+        shared_indices = set()
+        row_number = 0
+        with archive.open(sheet_path) as source:
+            for _, elem in ET.iterparse(source, events=("end",)):
+                if xml_local_name(elem.tag) != "row":
+                    continue
+                row_number = int(elem.get("r", row_number + 1))
+                if row_number > ANSWER_ROW:
+                    break
+                if row_number < ANSWER_ROW:
+                    elem.clear()
+                    continue
+                
+                column = 0
+                for cell in elem:
+                    if xml_local_name(cell.tag) != "c":
+                        continue
+                    column = xml_column_index(cell.get("r", "")) or column + 1
+                    cell_type = cell.get("t", "n")
+                    text = None
+                    for child in cell:
+                        child_name = xml_local_name(child.tag)
+                        if child_name == "v":
+                            text = child.text
+                        elif child_name == "is":
+                            text = "".join(t.text or "" for t in child.iter() if xml_local_name(t.tag) == "t")
+                    if text is None:
+                        continue
+                    
+                    if cell_type == "s":
+                        shared_indices.add(int(text))
+                        values[column] = ("s", int(text))
+                    elif cell_type == "b":
+                        values[column] = text == "1"
+                    elif cell_type == "n":
+                        values[column] = float(text) if any(c in text for c in ".eE") else int(text)
+                    else:
+                        # str (formula text), inlineStr, e (error code) and d (ISO date) stay as text
+                        values[column] = text
+                break
+        
+        shared_strings = xml_shared_strings(archive, shared_strings_path, shared_indices)
+    
+    if not values or max(values) < ANSWER_START_COLUMN:
+        return ()
+    
+    row = []
+    for column in range(ANSWER_START_COLUMN, max(values) + 1):
+        value = values.get(column)
+        if isinstance(value, tuple):
+            value = shared_strings.get(value[1])
+        row.append(value)
+    return tuple(row)
+
+@functools.lru_cache(maxsize=4)
+def load_solution_values_cached(solution_file_path, mtime_ns, size):
+    """
+    Load the solution answer row, memoized on the file's path, mtime and size
+    
+    Args:
+        solution_file_path: Path to the solution Excel file
+        mtime_ns: Modification time of the file, so edits invalidate the cache
+        size: Size of the file in bytes
+        
+    Returns:
+        Tuple of cell values starting at column E, or None if the solution worksheet is missing
+    """
+    # A JSON sidecar lets later processes skip opening the solution workbook entirely
+    cache_path = solution_file_path + ".cache.json"
+    cache_key = {
+        "version": SOLUTION_CACHE_VERSION,
+        "mtime_ns": mtime_ns,
+        "size": size,
+        "sheet": SOLUTION_SHEET_NAME,
+        "row": ANSWER_ROW,
+        "start_column": ANSWER_START_COLUMN
+    }
+    try:
+        with open(cache_path, encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached["key"] == cache_key:
+            values = cached["values"]
+            return None if values is None else tuple(values)
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    
+    values = load_answer_row(solution_file_path, SOLUTION_SHEET_NAME)
+    
+    # The sidecar is only an optimization; skip it if the values or directory don't allow it
+    try:
+        payload = json.dumps({"key": cache_key, "values": values})
+        
+        # Write to a unique temp file and swap it in, so concurrent readers never see partial JSON
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(cache_path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(payload)
+            os.replace(temp_path, cache_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+    except (OSError, TypeError):
+        pass
+    
+    return values
+
+def load_solution_values(solution_file_path="solution.xlsx"):
+    """
+    Load the Y/N answer values from row 1 of the solution worksheet
+    
+    The solution is parsed once per process and reused until the file changes.
+    
+    Args:
+        solution_file_path: Path to the solution Excel file
+        
+    Returns:
+        Tuple of cell values starting at column E, or None if the solution worksheet is missing
+    """
+    stat = os.stat(solution_file_path)
+    return load_solution_values_cached(os.path.abspath(solution_file_path), stat.st_mtime_ns, stat.st_size)
+
+def grade_answer_row(student_values, solution_values):
+    """
+    Grade already-extracted Y/N values from row 1
+    
+    Args:
+        student_values: Values from the student's answer row, starting at column E
+        solution_values: Values from the solution's answer row, starting at column E
+        
+    Returns:
+        Dictionary with score, feedback, and match counts
+    """
+    # Cells missing from the shorter row are empty, so zip never drops a graded cell
+    matches = 0
+    total_cells = 0
+    for student_value, solution_value in zip(student_values, solution_values):
+        if student_value is not None and solution_value is not None:
+            total_cells += 1
+            if student_value == solution_value:
+                matches += 1
+    
+    # Calculate score and generate feedback
+    score = matches / total_cells if total_cells > 0 else 0.0
+    percentage = score * 100
+    feedback = f"Your score: {percentage:.2f}%\nYou correctly matched {matches} out of {total_cells} cells."
+    
+    return {
+        "score": score,
+        "feedback": feedback,
+        "matches": matches,
+        "total_cells": total_cells
+    }
+
+def grade_excel_worksheet(student_file_path, solution_file_path="solution.xlsx", solution_values=None):
     """
     Grade Excel worksheet by comparing Y/N values in row 1
     
     Args:
         student_file_path: Path to the student's Excel file
         solution_file_path: Path to the solution Excel file
+        solution_values: Values from load_solution_values, to avoid reparsing the solution file
         
     Returns:
         Dictionary with score and feedback
     """
     try:
-        # Load workbooks
-        student_wb = openpyxl.load_workbook(student_file_path, data_only=True)
-        solution_wb = openpyxl.load_workbook(solution_file_path, data_only=True)
+        # Load Y/N values from row 1 in both workbooks
+        student_values = load_answer_row(student_file_path, STUDENT_SHEET_NAME)
+        if solution_values is None:
+            solution_values = load_solution_values(solution_file_path)
         
         # Verify sheets exist
-        if STUDENT_SHEET_NAME not in student_wb.sheetnames:
+        if student_values is None:
             return {
                 "score": 0.0,
                 "feedback": f"Error: Worksheet '{STUDENT_SHEET_NAME}' not found in your submission."
             }
         
-        if SOLUTION_SHEET_NAME not in solution_wb.sheetnames:
+        if solution_values is None:
             return {
                 "score": 0.0,
                 "feedback": f"Error: Solution worksheet not found."
             }
         
-        # Get sheets
-        student_sheet = student_wb[STUDENT_SHEET_NAME]
-        solution_sheet = solution_wb[SOLUTION_SHEET_NAME]
-        
-        # Get Y/N values from row 1 in both sheets
-        matches = 0
-        total_cells = 0
-        max_col = max(solution_sheet.max_column, student_sheet.max_column)
-        
-        # Start from column E (index 5 in openpyxl)
-        for col_idx in range(5, max_col + 1):
-            student_cell = student_sheet.cell(row=1, column=col_idx)
-            solution_cell = solution_sheet.cell(row=1, column=col_idx)
-            
-            if student_cell.value is not None and solution_cell.value is not None:
-                total_cells += 1
-                if student_cell.value == solution_cell.value:
-                    matches += 1
-        
-        # Calculate score and generate feedback
-        score = matches / total_cells if total_cells > 0 else 0.0
-        percentage = score * 100
-        feedback = f"Your score: {percentage:.2f}%\nYou correctly matched {matches} out of {total_cells} cells."
-        
-        return {
-            "score": score,
-            "feedback": feedback,
-            "matches": matches,
-            "total_cells": total_cells
-        }
+        return grade_answer_row(student_values, solution_values)
         
     except Exception as e:
         return {
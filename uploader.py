@@ -13,19 +13,40 @@ from grader import grade_excel_worksheet
 # Constants
 UPLOAD_FOLDER = "uploads"
 
-def upload_and_grade(file_path):
-    """Upload and grade an Excel file"""
+def copy_file(source_path, dest_path):
+    """Copy a file, letting the kernel copy (or reflink) the data when possible"""
+    if hasattr(os, "copy_file_range"):
+        try:
+            with open(source_path, 'rb') as src, open(dest_path, 'wb') as dst:
+                remaining = os.fstat(src.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(src.fileno(), dst.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            # Some filesystems report 0 bytes without copying; only a full copy counts
+            if remaining == 0:
+                return
+        except OSError:
+            # Not supported for this pair of filesystems
+            pass
+    
+    # Fall back to a regular copy, which rewrites any partial output from above
+    shutil.copyfile(source_path, dest_path)
+
+def process_upload(file_path, lines):
+    """Upload and grade an Excel file, appending status messages to lines"""
     # Create upload folder if needed
     os.makedirs(UPLOAD_FOLDER, exist_ok=True)
     
     # Check if file exists
     if not os.path.exists(file_path):
-        print(f"Error: File not found: {file_path}")
+        lines.append(f"Error: File not found: {file_path}")
         return False
     
     # Check if it's an Excel file
     if not file_path.lower().endswith(('.xlsx', '.xlsm')):
-        print(f"Error: File must be an Excel file (.xlsx, .xlsm)")
+        lines.append(f"Error: File must be an Excel file (.xlsx, .xlsm)")
         return False
         
     # Generate destination path
@@ -33,50 +54,72 @@ def upload_and_grade(file_path):
     filename = Path(file_path).name
     dest_path = os.path.join(UPLOAD_FOLDER, f"{Path(filename).stem}_{timestamp}{Path(filename).suffix}")
     
-    # Skip copying if already in uploads folder
-    if os.path.dirname(os.path.abspath(file_path)) == os.path.abspath(UPLOAD_FOLDER):
+    # Skip copying if already in uploads folder (compares inodes, no abspath/getcwd round trips)
+    if os.path.samefile(os.path.dirname(file_path) or ".", UPLOAD_FOLDER):
         dest_path = file_path
-        print(f"File already in uploads folder")
+        lines.append(f"File already in uploads folder")
     else:
         # Copy the file
         try:
-            shutil.copyfile(file_path, dest_path)
-            print(f"File uploaded to: {dest_path}")
+            copy_file(file_path, dest_path)
+            lines.append(f"File uploaded to: {dest_path}")
         except Exception as e:
-            print(f"Error copying file: {e}")
+            lines.append(f"Error copying file: {e}")
             return False
     
     # Grade the file
-    print(f"\n===== GRADING: {Path(dest_path).name} =====")
+    lines.append(f"\n===== GRADING: {Path(dest_path).name} =====")
     result = grade_excel_worksheet(dest_path)
     
     # Display results
     if 'score' in result:
-        print("\n" + "=" * 50)
-        print(result['feedback'])
-        print("=" * 50)
+        lines.append("\n" + "=" * 50)
+        lines.append(result['feedback'])
+        lines.append("=" * 50)
         
         # Save feedback
-        feedback_path = str(dest_path).rsplit('.', 1)[0] + "_feedback.txt"
-        with open(feedback_path, 'w') as f:
-            f.write(result['feedback'])
-        print(f"Feedback saved to: {feedback_path}")
+        feedback_path = Path(dest_path).with_name(Path(dest_path).stem + "_feedback.txt")
+        feedback_path.write_text(result['feedback'])
+        lines.append(f"Feedback saved to: {feedback_path}")
         return True
     else:
-        print(f"Error grading file: {result.get('feedback', 'Unknown error')}")
+        lines.append(f"Error grading file: {result.get('feedback', 'Unknown error')}")
         return False
 
+def upload_and_grade(file_path):
+    """Upload and grade an Excel file"""
+    # Buffer status lines so each file costs one stdout write instead of one per line
+    lines = []
+    try:
+        return process_upload(file_path, lines)
+    finally:
+        sys.stdout.write("\n".join(lines) + "\n")
+
 def main():
     print("\n===== EXCEL WORKSHEET UPLOADER & GRADER =====")
     
-    # Get file path
+    # Grade everything already in the uploads folder across worker processes
+    if "--batch" in sys.argv[1:]:
+        # Imported here so single-file runs don't pay for batch.py's openpyxl import
+        from batch import batch_grade, find_excel_files
+        
+        os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+        print(f"Grading all Excel files in: {UPLOAD_FOLDER}")
+        if batch_grade(find_excel_files(UPLOAD_FOLDER)):
+            print("\nProcess completed successfully!")
+        else:
+            print("\nBatch grading failed or had no files to process.")
+        return
+    
+    # Get file paths
     if len(sys.argv) > 1:
-        file_path = sys.argv[1]
+        file_paths = sys.argv[1:]
     else:
-        file_path = input("Enter the path to the Excel file: ")
+        file_paths = [input("Enter the path to the Excel file: ")]
     
-    # Process the file
-    if upload_and_grade(file_path):
+    # Process the files; the parsed solution is cached between them
+    results = [upload_and_grade(file_path) for file_path in file_paths]
+    if all(results):
         print("\nProcess completed successfully!")
     else:
         print("\nUpload failed. Please check the file and try again.")